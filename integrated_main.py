@@ -12,18 +12,31 @@ Yahooニュース 自動収集スクリプト（JMS／Mobility Show 対応・1
 
 import os
 import json
+import asyncio
+import hashlib
 import time
 import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
+import aiohttp
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.lexbor import LexborHTMLParser
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
 
@@ -33,10 +46,29 @@ SHEET_NAME = "Yahoo"
 KEYWORDS = ["JMS", "モビリティショー", "mobility show"]
 
 MAX_BODY_PAGES = 10
+BODY_FETCH_CONCURRENCY = 16  # 本文取得の同時リクエスト数
+COMMENT_FETCH_WORKERS = 4  # コメント取得の並列数（1スレッドにつきChrome 1つ）
 MAX_TOTAL_COMMENTS = 5000
+MAX_COMMENT_PAGES = MAX_TOTAL_COMMENTS // 10  # コメントページ取得の上限（無限ループ防止）
 COMMENTS_PER_CELL = 50  # コメント1セルあたり最大件数
+SEARCH_WAIT_SEC = 10  # 検索結果の表示待ち上限
+COMMENT_WAIT_SEC = 3  # コメントの表示待ち上限（超過時はコメントなし扱い）
 REQ_HEADERS = {"User-Agent": "Mozilla/5.0"}
 TZ_JST = timezone(timedelta(hours=9))
+MAX_ARTICLE_AGE_HOURS = int(os.environ.get("MAX_ARTICLE_AGE_HOURS") or 0)  # 投稿からの経過上限（0で無効）
+_SHEET_KEY = hashlib.sha256(SPREADSHEET_ID.encode("utf-8")).hexdigest()[:16]  # キャッシュをスプレッドシート単位で分ける
+URL_CACHE_PATH = os.environ.get("URL_CACHE_PATH", f".cache/urls-{_SHEET_KEY}.sqlite")  # 処理済みURLのローカルキャッシュ
+
+_LI_CLS = re.compile("sc-1u4589e-0")  # 検索結果の記事<li>
+_TITLE_CLS = re.compile("sc-3ls169-0")  # 記事タイトル<div>
+_WEEKDAY_RE = re.compile(r'\([月火水木金土日]\)')
+_RELATIVE_RE = re.compile(r'(\d+)\s*(分|時間)前')
+_RANGE_END_ROW_RE = re.compile(r'(\d+)$')  # 'Yahoo!A2:DM5' の終了行
+_RESULT_STRAINER = SoupStrainer("li", class_=_LI_CLS)  # 検索結果<li>以外は解析しない
+_RESULT_SEL = "li[class*='sc-1u4589e-0']"  # 検索結果の表示待ち
+_COMMENT_SEL = "p.sc-169yn8p-10, div.commentBody, p[data-ylk*='cm_body']"  # コメント本文
+_COMMENT_JS = "return Array.from(document.querySelectorAll(arguments[0]), e => e.innerText);"
+_WS_RE = re.compile(r'\s+')
 
 
 # ====== 共通関数 ======
@@ -52,7 +84,7 @@ def to_jst_from_str(raw: str) -> str:
     """Yahoo上の日付文字列をJST形式 'YYYY/MM/DD HH:MM' に統一"""
     if not raw:
         return "取得不可"
-    raw = re.sub(r'\([月火水木金土日]\)', '', raw).strip()
+    raw = _WEEKDAY_RE.sub('', raw).strip()
     for fmt in ("%Y/%m/%d %H:%M", "%m/%d %H:%M"):
         try:
             dt = datetime.strptime(raw, fmt)
@@ -64,6 +96,31 @@ def to_jst_from_str(raw: str) -> str:
     return raw
 
 
+def parse_post_date(date_str: str) -> Optional[datetime]:
+    """投稿日文字列（'YYYY/MM/DD HH:MM' / 'N分前' / 'N時間前'）をJSTのdatetimeに変換"""
+    m = _RELATIVE_RE.search(date_str)
+    if m:
+        n = int(m.group(1))
+        return jst_now() - (timedelta(minutes=n) if m.group(2) == "分" else timedelta(hours=n))
+    try:
+        return datetime.strptime(date_str, "%Y/%m/%d %H:%M").replace(tzinfo=TZ_JST)
+    except ValueError:
+        return None
+
+
+def is_recent(date_str: str) -> bool:
+    """MAX_ARTICLE_AGE_HOURS以内の投稿か（無効時・日付不明時はTrue）"""
+    if MAX_ARTICLE_AGE_HOURS <= 0:
+        return True
+    posted = parse_post_date(date_str)
+    return posted is None or posted >= jst_now() - timedelta(hours=MAX_ARTICLE_AGE_HOURS)
+
+
+def url_hash(url: str) -> bytes:
+    """重複判定用のURLダイジェスト（12バイト固定長）"""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=12).digest()
+
+
 def chunk(lst: List[str], size: int) -> List[List[str]]:
     return [lst[i:i + size] for i in range(0, len(lst), size)]
 
@@ -82,27 +139,57 @@ def build_gspread_client() -> gspread.Client:
         return gspread.service_account_from_dict(credentials)
 
 
-# ====== Yahooニュース検索 ======
-def get_yahoo_news_with_selenium(keyword: str) -> list[dict]:
-    print(f"🔎 検索中: {keyword}")
+# ====== Selenium ======
+_DRIVER_PATH: Optional[str] = None
+_DRIVER_PATH_LOCK = threading.Lock()
+
+
+def _driver_path() -> str:
+    """chromedriverのパスを1回だけ解決（環境変数CHROMEDRIVERがあれば優先）"""
+    global _DRIVER_PATH
+    with _DRIVER_PATH_LOCK:
+        if _DRIVER_PATH is None:
+            _DRIVER_PATH = os.environ.get("CHROMEDRIVER") or ChromeDriverManager().install()
+    return _DRIVER_PATH
+
+
+def make_driver() -> webdriver.Chrome:
+    """検索・コメント取得で使い回すヘッドレスChromeを起動"""
     options = Options()
+    options.page_load_strategy = "eager"  # DOMContentLoadedで制御を戻す（要素は明示的待機で確認）
     options.add_argument("--headless=new")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1280,1024")
+    options.add_argument("--window-size=1280,2000")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    # DOM解析のみなので画像・通知は読み込まない
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    return webdriver.Chrome(service=Service(_driver_path()), options=options)
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+# ====== Yahooニュース検索 ======
+def get_yahoo_news_with_selenium(driver: webdriver.Chrome, keyword: str) -> list[dict]:
+    print(f"🔎 検索中: {keyword}")
     search_url = f"https://news.yahoo.co.jp/search?p={keyword}&ei=utf-8&categories=domestic,world,business,it,science,life,local"
     driver.get(search_url)
-    time.sleep(3)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    driver.quit()
+    try:
+        WebDriverWait(driver, SEARCH_WAIT_SEC).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, _RESULT_SEL))
+        )
+    except TimeoutException:
+        pass  # 結果0件 or 遅延時はそのまま解析
+    soup = BeautifulSoup(driver.page_source, "lxml", parse_only=_RESULT_STRAINER)
 
-    articles = soup.find_all("li", class_=re.compile("sc-1u4589e-0"))
+    articles = soup.find_all("li", class_=_LI_CLS)
     results = []
     for a in articles:
         try:
-            title_tag = a.find("div", class_=re.compile("sc-3ls169-0"))
+            title_tag = a.find("div", class_=_TITLE_CLS)
             title = title_tag.text.strip() if title_tag else ""
             link_tag = a.find("a", href=True)
             url = link_tag["href"] if link_tag else ""
@@ -120,54 +207,112 @@ def get_yahoo_news_with_selenium(keyword: str) -> list[dict]:
 
 
 # ====== 本文・コメント取得 ======
-def fetch_article_pages(base_url: str) -> List[str]:
-    bodies = []
-    for page in range(1, MAX_BODY_PAGES + 1):
-        url = base_url if page == 1 else f"{base_url}?page={page}"
+_SESSION = requests.Session()  # HTTPでのコメント取得で接続を使い回す
+_SESSION.headers.update(REQ_HEADERS)
+_SESSION.mount("https://", HTTPAdapter(
+    pool_maxsize=COMMENT_FETCH_WORKERS,  # 接続先はnews.yahoo.co.jpのみ。ワーカー1スレッドにつき1接続
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+
+def _extract_body(html: str) -> str:
+    tree = LexborHTMLParser(html)
+    article = tree.css_first("article") or tree.css_first("main")
+    if article is None:
+        return ""
+    return "\n".join([t for p in article.css("p") if (t := p.text(strip=True))])
+
+
+async def _fetch_html(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, url: str, allow_redirects: bool = True
+) -> Optional[str]:
+    async with sem:
         try:
-            res = requests.get(url, headers=REQ_HEADERS, timeout=10)
-            res.raise_for_status()
+            async with session.get(url, allow_redirects=allow_redirects) as res:
+                res.raise_for_status()
+                if 300 <= res.status < 400:
+                    return None  # 存在しないページが1ページ目等へリダイレクトされた
+                return await res.text()
         except Exception:
+            return None
+
+
+async def fetch_article_pages(session: aiohttp.ClientSession, sem: asyncio.Semaphore, base_url: str) -> List[str]:
+    """本文の全ページを並行取得し、取得失敗・リダイレクト・空・重複ページ以降を切り捨て"""
+    urls = [base_url] + [f"{base_url}?page={page}" for page in range(2, MAX_BODY_PAGES + 1)]
+    htmls = await asyncio.gather(*(
+        _fetch_html(session, sem, u, allow_redirects=(i == 0)) for i, u in enumerate(urls)
+    ))
+
+    bodies = []
+    seen_hashes: set[bytes] = set()
+    for html in htmls:
+        if html is None:
             break
-        soup = BeautifulSoup(res.text, "html.parser")
-        article = soup.find("article") or soup.find("main")
-        if not article:
+        text = _extract_body(html)
+        if not text:
             break
-        ps = article.find_all("p")
-        text = "\n".join(p.get_text(strip=True) for p in ps if p.get_text(strip=True))
-        if not text or (bodies and text == bodies[-1]):
+        h = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        if h in seen_hashes:
             break
+        seen_hashes.add(h)
         bodies.append(text)
     return bodies
 
 
-def fetch_comments(base_url: str) -> List[List[str]]:
-    """コメント最大5000件を取得し、50件単位で分割"""
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--window-size=1280,2000")
+async def fetch_all_article_pages(urls: List[str]) -> List[List[str]]:
+    """全記事の本文を並行取得（結果はurlsと同じ順序）"""
+    sem = asyncio.Semaphore(BODY_FETCH_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=10)
+    connector = aiohttp.TCPConnector(limit=BODY_FETCH_CONCURRENCY)
+
+    async with aiohttp.ClientSession(headers=REQ_HEADERS, timeout=timeout, connector=connector) as session:
+        return await asyncio.gather(*(fetch_article_pages(session, sem, u) for u in urls))
+
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+def normalize_comment(text: str) -> str:
+    """HTTP・Selenium両経路で同じ表記になるよう空白・改行を1つの空白にまとめる"""
+    return _WS_RE.sub(" ", text).strip()
+
+
+def _parse_comments(html: str) -> List[str]:
+    soup = BeautifulSoup(html, "lxml")
+    elems = soup.select(_COMMENT_SEL)
+    for br in soup.find_all("br"):
+        br.replace_with("\n")  # innerTextと同様に<br>を改行として扱う
+    return [t for e in elems if (t := normalize_comment(e.get_text()))]
+
+
+def _page_overlap(prev: List[str], cur: List[str]) -> int:
+    """前ページ末尾と一致する今ページ先頭の件数（一覧がずれて再掲されたコメント）"""
+    for k in range(min(len(prev), len(cur)), 0, -1):
+        if prev[-k:] == cur[:k]:
+            return k
+    return 0
+
+
+def _collect_comments(fetch_page: Callable[[int], List[str]]) -> List[List[str]]:
+    """コメント最大5000件をページ順に取得し、50件単位で分割"""
     comments = []
-    page = 1
-    try:
-        while len(comments) < MAX_TOTAL_COMMENTS:
-            c_url = f"{base_url}/comments?page={page}"
-            driver.get(c_url)
-            time.sleep(2)
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            elems = soup.select("p.sc-169yn8p-10, div.commentBody, p[data-ylk*='cm_body']")
-            page_comments = [e.get_text(strip=True) for e in elems if e.get_text(strip=True)]
-            if not page_comments:
-                break
-            comments.extend(page_comments)
-            if len(page_comments) < 10:  # 最終ページ判定
-                break
-            page += 1
-    finally:
-        driver.quit()
+    prev_page: List[str] = []
+    seen_pages: set[bytes] = set()  # 範囲外ページで同じページが返された場合の検出用
+    for page in range(1, MAX_COMMENT_PAGES + 1):
+        if len(comments) >= MAX_TOTAL_COMMENTS:
+            break
+        page_comments = fetch_page(page)
+        if not page_comments:
+            break
+        sig = hashlib.blake2b("\0".join(page_comments).encode("utf-8"), digest_size=16).digest()
+        if sig in seen_pages:
+            break
+        seen_pages.add(sig)
+        new_comments = page_comments[_page_overlap(prev_page, page_comments):]
+        if not new_comments:  # 新規コメントのないページ → 終端
+            break
+        comments.extend(new_comments)
+        prev_page = page_comments
+        if len(page_comments) < 10:  # 最終ページ判定
+            break
 
     # 最大5000件に制限し、50件単位でチャンク化
     comments = comments[:MAX_TOTAL_COMMENTS]
@@ -175,53 +320,200 @@ def fetch_comments(base_url: str) -> List[List[str]]:
     return comment_cells
 
 
+def fetch_comments_http(base_url: str) -> List[List[str]]:
+    """ブラウザを使わずHTTPのみでコメント取得（サーバー側で描画されていない場合は空）"""
+    def fetch_page(page: int) -> List[str]:
+        try:
+            res = _SESSION.get(f"{base_url}/comments?page={page}", timeout=10, allow_redirects=(page == 1))
+            res.raise_for_status()
+        except Exception:
+            return []
+        if res.is_redirect:
+            return []  # 範囲外ページが1ページ目等へリダイレクトされた → 一覧の終端
+        return _parse_comments(res.text)
+
+    return _collect_comments(fetch_page)
+
+
+def fetch_comments(driver: webdriver.Chrome, base_url: str) -> List[List[str]]:
+    """Seleniumでコメント取得（HTTPで取れない場合のフォールバック）"""
+    def fetch_page(page: int) -> List[str]:
+        driver.get(f"{base_url}/comments?page={page}")
+        try:
+            WebDriverWait(driver, COMMENT_WAIT_SEC).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, _COMMENT_SEL))
+            )
+        except TimeoutException:
+            return []  # コメントなし
+        # page_sourceの再解析をせず、ブラウザ上のDOMから直接テキストを取得
+        texts = driver.execute_script(_COMMENT_JS, _COMMENT_SEL)
+        return [t for raw in texts if (t := normalize_comment(raw or ""))]
+
+    return _collect_comments(fetch_page)
+
+
+def fetch_all_comments(urls: List[str]) -> List[List[List[str]]]:
+    """全記事のコメントをスレッド並列で取得（結果はurlsと同じ順序）
+
+    まずHTTPで取得し、取れなかった記事だけSeleniumで再取得する。
+    """
+    local = threading.local()
+    drivers = []
+    lock = threading.Lock()
+
+    def fetch_one(url: str) -> List[List[str]]:
+        comment_cells = fetch_comments_http(url)
+        if comment_cells:
+            return comment_cells
+
+        driver = getattr(local, "driver", None)
+        if driver is None:
+            driver = make_driver()
+            local.driver = driver
+            with lock:
+                drivers.append(driver)
+        return fetch_comments(driver, url)
+
+    try:
+        with ThreadPoolExecutor(max_workers=COMMENT_FETCH_WORKERS) as ex:
+            return list(ex.map(fetch_one, urls))
+    finally:
+        for driver in drivers:
+            driver.quit()
+
+
+async def fetch_article_details(urls: List[str]) -> Tuple[List[List[str]], List[List[List[str]]]]:
+    """本文（aiohttp）とコメント（スレッドプール）を同時に取得"""
+    return await asyncio.gather(
+        fetch_all_article_pages(urls),
+        asyncio.to_thread(fetch_all_comments, urls),
+    )
+
+
 # ====== スプレッドシート ======
-def ensure_yahoo_sheet(gc: gspread.Client):
+SHEET_HEADER = (
+    ["ソース", "タイトル", "URL", "投稿日", "掲載元", "取得日時"]
+    + [f"本文({i}ページ)" for i in range(1, MAX_BODY_PAGES + 1)]
+    + ["コメント数"]
+    + [f"コメント({i*50-49}〜{i*50})" for i in range(1, 101)]
+)
+
+
+def ensure_yahoo_sheet(gc: gspread.Client) -> gspread.Spreadsheet:
     sh = gc.open_by_key(SPREADSHEET_ID)
     try:
-        ws = sh.worksheet(SHEET_NAME)
+        sh.worksheet(SHEET_NAME)
     except gspread.exceptions.WorksheetNotFound:
-        ws = sh.add_worksheet(title=SHEET_NAME, rows="1000", cols="100")
-        ws.append_row(
-            ["ソース", "タイトル", "URL", "投稿日", "掲載元", "取得日時"]
-            + [f"本文({i}ページ)" for i in range(1, MAX_BODY_PAGES + 1)]
-            + ["コメント数"]
-            + [f"コメント({i*50-49}〜{i*50})" for i in range(1, 101)]
-        )
-    return ws
+        sh.add_worksheet(title=SHEET_NAME, rows="1000", cols="100")
+    return sh
 
 
-def append_to_sheet(ws, data: List[List[str]]):
-    if data:
-        ws.append_rows(data, value_input_option="USER_ENTERED")
-        print(f"📝 {len(data)}行追加しました。")
+def batched_read(sh: gspread.Spreadsheet, ranges: List[str], major_dimension: str = "ROWS") -> List[List[List[str]]]:
+    """複数レンジを1回のbatchGetで取得（rangesと同じ順序）"""
+    res = sh.values_batch_get(ranges, params={"majorDimension": major_dimension})
+    return [vr.get("values", []) for vr in res.get("valueRanges", [])]
+
+
+def append_to_sheet(sh: gspread.Spreadsheet, data: List[List[str]]) -> Optional[int]:
+    """ヘッダー・新規行をまとめて1回のappendで書き込み、書き込んだ最終行番号を返す"""
+    if not data:
+        return None
+    res = sh.values_append(
+        f"{SHEET_NAME}!A1",
+        params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+        body={"values": data},
+    )
+    print(f"📝 {len(data)}行追加しました。")
+    m = _RANGE_END_ROW_RE.search(res.get("updates", {}).get("updatedRange", ""))
+    return int(m.group(1)) if m else None
+
+
+# ====== 処理済みURLキャッシュ ======
+def open_url_cache(path: str = URL_CACHE_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS seen(h BLOB PRIMARY KEY)")
+    conn.execute("CREATE TABLE IF NOT EXISTS marker(id INTEGER PRIMARY KEY CHECK (id = 1), last_row INTEGER, last_h BLOB)")
+    return conn
+
+
+def load_cached_hashes(conn: sqlite3.Connection) -> set[bytes]:
+    return {row[0] for row in conn.execute("SELECT h FROM seen")}
+
+
+def record_cached_hashes(conn: sqlite3.Connection, hashes):
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO seen(h) VALUES (?)", ((h,) for h in hashes))
+
+
+def load_cache_marker(conn: sqlite3.Connection) -> Optional[Tuple[int, bytes]]:
+    """キャッシュ保存時のシート最終行番号と、その行のURLダイジェスト"""
+    row = conn.execute("SELECT last_row, last_h FROM marker WHERE id = 1").fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def save_cache_marker(conn: sqlite3.Connection, marker: Optional[Tuple[int, bytes]]):
+    """最終行の情報を保存（Noneなら削除し、次回はシートを全件読み込み）"""
+    with conn:
+        conn.execute("DELETE FROM marker")
+        if marker:
+            conn.execute("INSERT INTO marker(id, last_row, last_h) VALUES (1, ?, ?)", marker)
 
 
 # ====== メイン処理 ======
 def main():
     gc = build_gspread_client()
-    ws = ensure_yahoo_sheet(gc)
-    existing_urls = set(ws.col_values(3)[1:])  # URL列(C)
+    sh = ensure_yahoo_sheet(gc)
+    cache = open_url_cache()
+    cached_urls = load_cached_hashes(cache)
+    marker = load_cache_marker(cache) if cached_urls else None
+    sheet_urls = set()
+    if marker:
+        # キャッシュ保存時の最終行が今もシートの最終行か（以降に行がないか）を確認
+        last_row, last_h = marker
+        try:
+            header_cell, tail = batched_read(sh, [f"{SHEET_NAME}!A1", f"{SHEET_NAME}!C{last_row}:C"])
+        except gspread.exceptions.APIError:
+            tail = []  # 行削除でグリッド外になった等
+        if not (len(tail) == 1 and tail[0] and url_hash(tail[0][0]) == last_h):
+            marker = None  # キャッシュ保存後にシートが変化（保存失敗・手動編集等）→ 全件読み込み
+    if marker is None:
+        header_cell, url_cols = batched_read(
+            sh, [f"{SHEET_NAME}!A1", f"{SHEET_NAME}!C2:C"], major_dimension="COLUMNS"
+        )
+        url_col = url_cols[0] if url_cols else []
+        sheet_urls = {url_hash(u) for u in url_col if u}  # URL列(C)
+        if url_col:
+            marker = (len(url_col) + 1, url_hash(url_col[-1]))
+    existing_urls = sheet_urls | cached_urls
+
+    driver = make_driver()
+    try:
+        new_articles = []
+        seen = set(existing_urls)  # 既存URL＋キーワード間の重複URLを除外
+        for kw in KEYWORDS:
+            for art in get_yahoo_news_with_selenium(driver, kw):
+                h = url_hash(art["URL"])
+                if h in seen or not is_recent(art["投稿日"]):
+                    continue
+                seen.add(h)
+                new_articles.append(art)
+            time.sleep(1)
+    finally:
+        driver.quit()
 
-    all_articles = []
-    for kw in KEYWORDS:
-        all_articles.extend(get_yahoo_news_with_selenium(kw))
-        time.sleep(1)
+    new_urls = [art["URL"] for art in new_articles]
+    all_bodies, all_comments = asyncio.run(fetch_article_details(new_urls))
 
     new_rows = []
-    for art in all_articles:
+    for art, bodies, comment_cells in zip(new_articles, all_bodies, all_comments):
         url = art["URL"]
-        if url in existing_urls:
-            continue
-
         title = art["タイトル"]
         date = art["投稿日"]
         site = art["掲載元"]
         timestamp = format_datetime(jst_now())
 
-        bodies = fetch_article_pages(url)
-        comment_cells = fetch_comments(url)
-        comment_jsons = [json.dumps(pg, ensure_ascii=False) for pg in comment_cells]
+        comment_jsons = [json.dumps(pg, ensure_ascii=False, separators=(",", ":")) for pg in comment_cells]
         comment_count = sum(len(pg) for pg in comment_cells)
 
         row = (
@@ -231,9 +523,17 @@ def main():
         )
         new_rows.append(row)
 
-    if new_rows:
-        append_to_sheet(ws, new_rows)
-    else:
+    # 新規シートの場合はヘッダーも同じappendで書き込む
+    last_row = append_to_sheet(sh, new_rows if header_cell else [SHEET_HEADER] + new_rows)
+    if new_rows and last_row:
+        marker = (last_row, url_hash(new_urls[-1]))
+    elif new_rows:
+        marker = None  # 最終行が不明なら次回は全件読み込み
+    # 書き込み成功後にキャッシュへ反映（シート上のURLもミラー）
+    record_cached_hashes(cache, sheet_urls | {url_hash(u) for u in new_urls})
+    save_cache_marker(cache, marker)
+    cache.close()
+    if not new_rows:
         print("⚠️ 新規記事なし。")
 
 